@@ -5,19 +5,30 @@ Collects data without loading full analyzer into memory
 """
 
 import sys
-import yaml
+from config_util import load_config
+from observation_store import append_observation, append_observations
 from weather_data_collector import WeatherDataCollector
 from pathlib import Path
-import csv
 from datetime import datetime
+from typing import Dict, List, Optional
 
 
-def collect_lightweight(config_path='config.yaml'):
-    """Collect data with minimal memory footprint"""
+def collect_lightweight(config_path='config.yaml', rows: Optional[List[Dict]] = None):
+    """
+    Collect data with minimal memory footprint.
+    If rows are given (e.g. backfilled observations), they are appended in
+    one write instead of fetching current weather; an empty list stores nothing.
+    """
 
     # Load config
-    with open(config_path, 'r') as f:
-        config = yaml.safe_load(f)
+    config = load_config(config_path)
+
+    if rows is not None:
+        data_path = Path(config['data_collection']['storage_path'])
+        data_path.parent.mkdir(parents=True, exist_ok=True)
+        append_observations(data_path, rows)
+        print(f"✓ {len(rows)} observations stored")
+        return 0
 
     # Collect weather
     collector = WeatherDataCollector(config_path)
@@ -31,11 +42,6 @@ def collect_lightweight(config_path='config.yaml'):
     weather['wind_direction_name'] = collector.get_wind_direction_name(
         weather['wind_direction_deg']
     )
-    weather['is_daytime'] = collector.is_daytime(
-        weather['timestamp'],
-        weather['sunrise'],
-        weather['sunset']
-    )
     weather['pipe_frozen'] = False
     weather['notes'] = ""
 
@@ -44,16 +50,7 @@ def collect_lightweight(config_path='config.yaml'):
     data_path.parent.mkdir(parents=True, exist_ok=True)
 
     # Write to CSV (append mode)
-    file_exists = data_path.exists()
-
-    with open(data_path, 'a', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=weather.keys())
-
-        # Write header if new file
-        if not file_exists:
-            writer.writeheader()
-
-        writer.writerow(weather)
+    append_observation(data_path, weather)
 
     print(f"✓ Data collected: {weather['temperature_f']}°F, "
           f"Wind chill: {weather['wind_chill_f']}°F, "
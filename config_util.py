@@ -0,0 +1,76 @@
+"""
+Configuration Utilities
+Shared loader for the YAML configuration used by all modules
+"""
+
+import functools
+import os
+import pickle
+from pathlib import Path
+from typing import Dict
+
+
+def _parse_yaml(path: str) -> Dict:
+    """
+    Parse a YAML configuration file.
+    PyYAML is imported here rather than at module load, so runs served
+    from the pickled sidecar never import it. The LibYAML-backed loader
+    is much faster than the pure-Python one when available.
+    """
+    import yaml
+
+    loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+    with open(path, 'r') as f:
+        return yaml.load(f, Loader=loader)
+
+
+def load_config_cached(path: str) -> Dict:
+    """
+    Load configuration through a pickled sidecar (``<path>.pkl``).
+    The sidecar starts with the YAML file's (mtime_ns, size) so a stale
+    copy is detected without unpickling the config itself.
+    """
+    st = os.stat(path)
+    key = (st.st_mtime_ns, st.st_size)
+    sidecar = path + '.pkl'
+
+    try:
+        with open(sidecar, 'rb') as f:
+            if pickle.load(f) == key:
+                return pickle.load(f)
+    except Exception:
+        # Missing, stale-format or corrupt sidecar: fall back to parsing
+        pass
+
+    config = _parse_yaml(path)
+
+    tmp_path = f"{sidecar}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(key, f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(config, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, sidecar)
+    except OSError:
+        # Read-only config directory; the sidecar is only an optimization
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+    return config
+
+
+@functools.lru_cache(maxsize=8)
+def _load_config(path: str, mtime_ns: int) -> Dict:
+    """Parse a configuration file once per version of the file"""
+    return load_config_cached(path)
+
+
+def load_config(config_path: str = "config.yaml") -> Dict:
+    """
+    Load configuration, memoized by absolute path and modification time,
+    so an edited file is picked up by the next call.
+    The returned dict is shared between callers and must not be mutated.
+    """
+    path = str(Path(config_path).resolve())
+    return _load_config(path, os.stat(path).st_mtime_ns)
@@ -3,13 +3,141 @@ Frozen Pipe Analyzer
 Main module for analyzing weather conditions and pipe freezing patterns
 """
 
+import functools
+import numpy as np
 import pandas as pd
-import yaml
 from datetime import datetime, timedelta
 from pathlib import Path
 import json
 from typing import Dict, List, Optional
-from weather_data_collector import WeatherDataCollector
+from config_util import load_config
+from observation_store import append_observation
+from weather_data_collector import WeatherDataCollector, WIND_DIRECTIONS
+
+# PyArrow's multithreaded CSV parser is optional; pandas' C engine is the fallback
+try:
+    import pyarrow  # noqa: F401
+    _CSV_ENGINE = 'pyarrow'
+except ImportError:
+    _CSV_ENGINE = 'c'
+
+
+@functools.lru_cache(maxsize=None)
+def _numba():
+    """
+    The numba module, or None if it is not installed.
+    Numba is optional and only the batch kernels use it, so it is imported
+    on first use rather than slowing down every command's startup.
+    """
+    try:
+        import numba
+    except ImportError:
+        return None
+    return numba
+
+
+def _risk_scores(temp_f, wind_chill_f, wind_speed, humidity, clouds_percent,
+                 is_daytime, is_vulnerable, weights):
+    """
+    Freeze risk score for each row.
+    Mirrors the arithmetic of FrozenPipeAnalyzer.analyze_conditions.
+    """
+    score = np.where(temp_f < 32,
+                     np.minimum((32 - temp_f) / 20, 1.0) * weights[0], 0.0)
+    score += np.where(wind_chill_f < temp_f,
+                      np.minimum((temp_f - wind_chill_f) / 15, 1.0) * weights[1], 0.0)
+    score += np.where(is_vulnerable & (wind_speed > 5),
+                      np.minimum(wind_speed / 25, 1.0) * weights[2], 0.0)
+    score += np.where((humidity > 70) & (temp_f < 35),
+                      np.minimum((humidity - 70) / 30, 1.0) * weights[3], 0.0)
+
+    # Protective factors
+    score *= np.where(temp_f < 10, 0.3, 1.0)
+    score *= np.where(wind_speed < 5, 0.9, 1.0)
+    score *= np.where(is_daytime & (clouds_percent < 50), 0.8, 1.0)
+
+    return np.minimum(score, 1.0)
+
+
+@functools.lru_cache(maxsize=None)
+def _risk_kernel():
+    """_risk_scores, JIT-compiled with Numba on first use when available"""
+    numba = _numba()
+    if numba is None:
+        return _risk_scores
+    return numba.njit(cache=True, parallel=True)(_risk_scores)
+
+
+def _wind_chill_kernel(temp_f, wind_speed_mph):
+    """Elementwise form of WeatherDataCollector._calculate_wind_chill"""
+    if temp_f > 50 or wind_speed_mph < 3:
+        return temp_f
+    w16 = wind_speed_mph ** 0.16
+    return round(35.74 + 0.6215 * temp_f + (-35.75 + 0.4275 * temp_f) * w16, 2)
+
+
+@functools.lru_cache(maxsize=None)
+def _wind_chill_ufunc():
+    """The wind chill kernel compiled into a Numba ufunc on first use, or None"""
+    numba = _numba()
+    if numba is None:
+        return None
+    return numba.vectorize(['float64(float64, float64)'], cache=True)(_wind_chill_kernel)
+
+
+def calculate_wind_chill_vec(temp_f: np.ndarray, wind_speed_mph: np.ndarray) -> np.ndarray:
+    """
+    Vectorized NWS wind chill over arrays of temperatures and wind speeds.
+    Outside the formula's validity range the air temperature is returned,
+    as in WeatherDataCollector._calculate_wind_chill.
+    """
+    temp_f = np.asarray(temp_f, dtype=np.float64)
+    wind_speed_mph = np.asarray(wind_speed_mph, dtype=np.float64)
+
+    wind_chill_ufunc = _wind_chill_ufunc()
+    if wind_chill_ufunc is not None:
+        return wind_chill_ufunc(temp_f, wind_speed_mph)
+
+    w16 = np.power(wind_speed_mph, 0.16)
+    wind_chill = np.round(35.74 + 0.6215 * temp_f + (-35.75 + 0.4275 * temp_f) * w16, 2)
+
+    return np.where((temp_f > 50) | (wind_speed_mph < 3), temp_f, wind_chill)
+
+
+_WIND_DIRECTION_NAMES = np.array(WIND_DIRECTIONS)
+
+
+def get_wind_direction_names_vec(degrees: np.ndarray) -> np.ndarray:
+    """Vectorized WeatherDataCollector.get_wind_direction_name"""
+    index = ((np.asarray(degrees) + 11.25) // 22.5).astype(np.int32) & 15
+    return _WIND_DIRECTION_NAMES[index]
+
+
+# Known column types, so the CSV reader can skip type inference
+OBSERVATION_DTYPES = {
+    'temperature_f': 'float64', 'feels_like_f': 'float64', 'wind_chill_f': 'float64',
+    'humidity': 'float64', 'pressure': 'float64', 'wind_speed_mph': 'float64',
+    'wind_direction_deg': 'float64', 'wind_gust_mph': 'float64',
+    'clouds_percent': 'float64', 'visibility_meters': 'float64',
+    'rain_1h_mm': 'float64', 'snow_1h_mm': 'float64',
+    'is_daytime': 'boolean', 'pipe_frozen': 'bool'
+}
+
+# Columns parsed to datetime64 when the history is loaded
+DATE_COLUMNS = ['timestamp', 'sunrise', 'sunset']
+
+# Subset of the history read by the statistical analysis
+ANALYSIS_COLUMNS = [
+    'temperature_f', 'wind_chill_f', 'wind_speed_mph', 'wind_direction_deg',
+    'humidity', 'clouds_percent', 'is_daytime', 'pipe_frozen'
+]
+
+# Weather readings carry about 0.1 precision, so the analysis loads its numeric
+# columns as float32. Displayed values keep float64 to print as recorded.
+ANALYSIS_DTYPES = {
+    column: 'float32' if dtype == 'float64' else dtype
+    for column, dtype in OBSERVATION_DTYPES.items()
+}
 
 
 class FrozenPipeAnalyzer:
@@ -17,55 +145,100 @@ class FrozenPipeAnalyzer:
 
     def __init__(self, config_path: str = "config.yaml"):
         """Initialize analyzer with configuration"""
-        with open(config_path, 'r') as f:
-            self.config = yaml.safe_load(f)
+        self.config = load_config(config_path)
 
         self.collector = WeatherDataCollector(config_path)
         self.data_path = Path(self.config['data_collection']['storage_path'])
         self.data_path.parent.mkdir(parents=True, exist_ok=True)
-
-        # Initialize or load historical data
-        self.df = self._load_or_create_dataframe()
-
-    def _load_or_create_dataframe(self) -> pd.DataFrame:
-        """Load existing data or create new dataframe"""
-        if self.data_path.exists():
-            return pd.read_csv(self.data_path)
-        else:
-            return pd.DataFrame(columns=[
-                'timestamp', 'temperature_f', 'feels_like_f', 'wind_chill_f',
-                'humidity', 'pressure', 'wind_speed_mph', 'wind_direction_deg',
-                'wind_direction_name', 'wind_gust_mph', 'weather_condition',
-                'weather_description', 'clouds_percent', 'visibility_meters',
-                'rain_1h_mm', 'snow_1h_mm', 'is_daytime', 'sunrise', 'sunset',
-                'pipe_frozen', 'notes'
-            ])
-
-    def collect_and_store(self, pipe_frozen: bool = False, notes: str = "") -> bool:
-        """Collect current weather data and store it"""
-        weather = self.collector.collect_current_weather()
-
+        # Timestamp of the last reading stored by this analyzer
+        self._last_stored_timestamp = None
+
+        # Analysis settings bound once so analyze_conditions avoids config lookups
+        self._vuln_dirs = np.asarray(self.config['analysis']['vulnerable_wind_directions'])
+        self._vuln_tol = int(self.config['analysis']['vulnerable_direction_tolerance'])
+        # Weights of temperature, wind chill, wind direction and humidity risk
+        self._risk_weights = (0.3, 0.4, 0.2, 0.1)
+
+        # Vulnerability of each whole-degree wind direction
+        self._vuln_dir_lut = np.zeros(360, dtype=bool)
+        for vdir in self._vuln_dirs:
+            for offset in range(-self._vuln_tol, self._vuln_tol + 1):
+                self._vuln_dir_lut[(int(vdir) + offset) % 360] = True
+
+    @functools.cached_property
+    def df(self) -> Optional[pd.DataFrame]:
+        """Historical data (None if nothing was collected), loaded on first access"""
+        return self._load_or_create_dataframe()
+
+    @functools.cached_property
+    def analysis_df(self) -> Optional[pd.DataFrame]:
+        """Historical data restricted to ANALYSIS_COLUMNS, loaded on first access"""
+        return self._load_or_create_dataframe(ANALYSIS_COLUMNS, ANALYSIS_DTYPES)
+
+    def _load_or_create_dataframe(self, columns: Optional[List[str]] = None,
+                                  dtypes: Dict[str, str] = OBSERVATION_DTYPES) -> Optional[pd.DataFrame]:
+        """
+        Load existing data, or return None if no data file exists yet.
+        Only the requested columns are parsed. Flag columns are read as
+        nullable booleans so that both CSV engines accept blank cells.
+        A blank pipe_frozen counts as False; a blank is_daytime stays NA,
+        since the reading is then neither known day nor known night.
+        """
+        if not self.data_path.exists():
+            return None
+
+        parse_dates = [c for c in DATE_COLUMNS if columns is None or c in columns]
+        read_dtypes = {c: 'boolean' if t == 'bool' else t for c, t in dtypes.items()}
+        df = pd.read_csv(self.data_path, engine=_CSV_ENGINE, usecols=columns,
+                         dtype=read_dtypes, parse_dates=parse_dates)
+
+        flags = [c for c, t in dtypes.items() if t == 'bool' and c in df.columns]
+        df[flags] = df[flags].fillna(False).astype(bool)
+        return df
+
+    def collect_and_store(self, pipe_frozen: bool = False, notes: str = "",
+                          force_refresh: Optional[bool] = None) -> bool:
+        """
+        Collect current weather data and store it.
+        A freeze report fetches a fresh reading unless force_refresh says otherwise.
+        """
+        if force_refresh is None:
+            force_refresh = pipe_frozen
+        weather = self.collector.collect_current_weather(force_refresh=force_refresh)
+        return self.store_weather(weather, pipe_frozen=pipe_frozen, notes=notes)
+
+    def store_weather(self, weather: Optional[Dict], pipe_frozen: bool = False,
+                      notes: str = "") -> bool:
+        """Store an already collected weather reading"""
         if not weather:
             print("Failed to collect weather data")
             return False
 
+        # A stale cached reading is fine to display but not to record again
+        if weather.get('stale'):
+            print("Weather API unavailable; not storing cached data")
+            return False
+
+        # The collector's cache can hand back a reading that was already
+        # stored; skip it unless it carries a freeze report
+        if not pipe_frozen and weather['timestamp'] == self._last_stored_timestamp:
+            print(f"No new weather data since {weather['timestamp']}")
+            return False
+
         # Enhance data
         weather['wind_direction_name'] = self.collector.get_wind_direction_name(
             weather['wind_direction_deg']
         )
-        weather['is_daytime'] = self.collector.is_daytime(
-            weather['timestamp'],
-            weather['sunrise'],
-            weather['sunset']
-        )
         weather['pipe_frozen'] = pipe_frozen
         weather['notes'] = notes
 
-        # Append to dataframe
-        self.df = pd.concat([self.df, pd.DataFrame([weather])], ignore_index=True)
+        # Append to CSV
+        append_observation(self.data_path, weather)
+        self._last_stored_timestamp = weather['timestamp']
 
-        # Save to CSV
-        self.df.to_csv(self.data_path, index=False)
+        # Drop any loaded history; the next access rereads the file
+        self.__dict__.pop('df', None)
+        self.__dict__.pop('analysis_df', None)
 
         print(f"✓ Data collected at {weather['timestamp']}")
         print(f"  Temperature: {weather['temperature_f']}°F")
@@ -90,6 +263,9 @@ class FrozenPipeAnalyzer:
         wind_speed = weather['wind_speed_mph']
         humidity = weather['humidity']
 
+        temp_weight, chill_weight, dir_weight, humidity_weight = self._risk_weights
+        vuln_dir_lut = self._vuln_dir_lut
+
         # Factor 1: Temperature
         if temp_f < 32:
             risk = min((32 - temp_f) / 20, 1.0)  # Scale 0-1
@@ -98,7 +274,7 @@ class FrozenPipeAnalyzer:
                 'value': f"{temp_f}°F",
                 'risk_contribution': risk
             })
-            analysis['freeze_risk_score'] += risk * 0.3
+            analysis['freeze_risk_score'] += risk * temp_weight
 
         # Factor 2: Wind Chill (critical factor)
         if wind_chill_f < temp_f:
@@ -109,16 +285,10 @@ class FrozenPipeAnalyzer:
                 'value': f"{wind_chill_f}°F (feels {chill_diff}°F colder)",
                 'risk_contribution': risk
             })
-            analysis['freeze_risk_score'] += risk * 0.4
+            analysis['freeze_risk_score'] += risk * chill_weight
 
         # Factor 3: Wind Direction (vulnerable directions)
-        vulnerable_dirs = self.config['analysis']['vulnerable_wind_directions']
-        tolerance = self.config['analysis']['vulnerable_direction_tolerance']
-
-        is_vulnerable_direction = any(
-            abs(wind_dir - vdir) <= tolerance or abs(wind_dir - vdir) >= (360 - tolerance)
-            for vdir in vulnerable_dirs
-        )
+        is_vulnerable_direction = vuln_dir_lut[int(wind_dir) % 360]
 
         if is_vulnerable_direction and wind_speed > 5:
             risk = min(wind_speed / 25, 1.0)
@@ -127,7 +297,7 @@ class FrozenPipeAnalyzer:
                 'value': f"{self.collector.get_wind_direction_name(wind_dir)} at {wind_speed} mph",
                 'risk_contribution': risk
             })
-            analysis['freeze_risk_score'] += risk * 0.2
+            analysis['freeze_risk_score'] += risk * dir_weight
 
         # Factor 4: High Humidity (increases heat loss)
         if humidity > 70 and temp_f < 35:
@@ -137,7 +307,7 @@ class FrozenPipeAnalyzer:
                 'value': f"{humidity}%",
                 'risk_contribution': risk
             })
-            analysis['freeze_risk_score'] += risk * 0.1
+            analysis['freeze_risk_score'] += risk * humidity_weight
 
         # Protective Factor 1: Extreme Cold (pipes may have been protected/drained)
         if temp_f < 10:
@@ -171,30 +341,60 @@ class FrozenPipeAnalyzer:
 
         return analysis
 
+    def analyze_conditions_batch(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Freeze risk scores for every row of a frame of observations, as float64.
+        The inputs are read as float32, so the scores agree with
+        analyze_conditions to float32 precision (about 1e-7), not exactly.
+        """
+        temp_f = df['temperature_f'].to_numpy(dtype=np.float32)
+        wind_speed = df['wind_speed_mph'].to_numpy(dtype=np.float32)
+
+        # Rows imported without a wind chill get it derived from temperature and wind
+        wind_chill = df['wind_chill_f'].to_numpy(dtype=np.float32)
+        missing = np.isnan(wind_chill)
+        if missing.any():
+            wind_chill = np.where(missing, calculate_wind_chill_vec(temp_f, wind_speed),
+                                  wind_chill).astype(np.float32)
+
+        return _risk_kernel()(
+            temp_f,
+            wind_chill,
+            wind_speed,
+            df['humidity'].to_numpy(dtype=np.float32),
+            df['clouds_percent'].to_numpy(dtype=np.float32),
+            df['is_daytime'].to_numpy(dtype=bool, na_value=False),
+            self.vulnerable_direction_mask(df['wind_direction_deg'].to_numpy()),
+            np.asarray(self._risk_weights, dtype=np.float32)
+        ).astype(np.float64)
+
+    def vulnerable_direction_mask(self, degrees: np.ndarray) -> np.ndarray:
+        """Vectorized check of wind directions against the vulnerable directions"""
+        degrees = np.asarray(degrees)
+        valid = np.isfinite(degrees)
+        index = np.where(valid, degrees, 0).astype(np.int64) % 360
+        return self._vuln_dir_lut[index] & valid
+
     def get_freeze_events(self) -> pd.DataFrame:
         """Get all recorded freeze events"""
-        if self.df.empty:
+        if self.df is None or len(self.df) == 0:
             return pd.DataFrame()
 
-        freeze_df = self.df[self.df['pipe_frozen'] == True].copy()
-        freeze_df['timestamp'] = pd.to_datetime(freeze_df['timestamp'])
-        return freeze_df
+        return self.df[self.df['pipe_frozen'] == True]
 
     def get_no_freeze_cold_events(self, temp_threshold: float = 32) -> pd.DataFrame:
         """Get events where it was cold but pipe didn't freeze"""
-        if self.df.empty:
+        if self.df is None or len(self.df) == 0:
             return pd.DataFrame()
 
-        no_freeze_df = self.df[
+        return self.df[
             (self.df['pipe_frozen'] == False) &
             (self.df['temperature_f'] < temp_threshold)
-        ].copy()
-        no_freeze_df['timestamp'] = pd.to_datetime(no_freeze_df['timestamp'])
-        return no_freeze_df
+        ]
 
     def print_summary(self):
         """Print summary of collected data"""
-        if self.df.empty:
+        if self.df is None or len(self.df) == 0:
             print("No data collected yet.")
             return
 
@@ -209,14 +409,18 @@ class FrozenPipeAnalyzer:
 
         if not freeze_events.empty:
             print("\nFreeze Event Details:")
-            for _, event in freeze_events.iterrows():
-                print(f"  • {event['timestamp']}")
-                print(f"    Temp: {event['temperature_f']}°F, Wind Chill: {event['wind_chill_f']}°F")
-                print(f"    Wind: {event['wind_speed_mph']} mph from {event['wind_direction_name']}")
-                print(f"    Notes: {event['notes']}")
+            events = freeze_events[[
+                'timestamp', 'temperature_f', 'wind_chill_f',
+                'wind_speed_mph', 'wind_direction_name', 'notes'
+            ]].itertuples(index=False, name=None)
+            for timestamp, temp_f, wind_chill_f, wind_speed, wind_dir, notes in events:
+                print(f"  • {timestamp}")
+                print(f"    Temp: {temp_f}°F, Wind Chill: {wind_chill_f}°F")
+                print(f"    Wind: {wind_speed} mph from {wind_dir}")
+                print(f"    Notes: {notes}")
 
         # Temperature statistics
-        if not self.df.empty:
+        if len(self.df) > 0:
             print(f"\nTemperature Statistics:")
             print(f"  Min: {self.df['temperature_f'].min()}°F")
             print(f"  Max: {self.df['temperature_f'].max()}°F")
@@ -248,7 +452,7 @@ if __name__ == "__main__":
         if cmd == "quit":
             break
         elif cmd == "collect":
-            analyzer.collect_and_store()
+            analyzer.collect_and_store(force_refresh=True)
         elif cmd == "freeze":
             notes = input("Notes about freeze event: ")
             analyzer.collect_and_store(pipe_frozen=True, notes=notes)
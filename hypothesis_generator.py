@@ -5,77 +5,176 @@ This module analyzes collected data to understand why pipes freeze at certain
 temperatures but not at much colder temperatures (non-linear behavior).
 """
 
+import io
+import json
+import os
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Tuple
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
 from pathlib import Path
-import yaml
+from config_util import load_config
 from frozen_pipe_analyzer import FrozenPipeAnalyzer
 from datetime import datetime
 
+# orjson is optional; it reads and writes the report cache faster
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+_RULE = "=" * 70
+
+_REPORT_HEADER = f"""{_RULE}
+FROZEN PIPE NON-LINEAR BEHAVIOR ANALYSIS
+{_RULE}
+
+Generated: {{timestamp}}
+
+Data Summary:
+  • Total Observations: {{total_observations}}
+  • Freeze Events: {{freeze_events}}
+  • Cold No-Freeze Events: {{cold_no_freeze_events}}
+
+{_RULE}
+HYPOTHESES FOR NON-LINEAR FREEZING PATTERN
+{_RULE}"""
+
+_HYPOTHESIS_HEADER = """
+
+{index}. {name}
+   Confidence: {confidence:.0%}
+
+   {description}
+
+   Evidence:"""
+
+_REPORT_FOOTER = f"""
+{_RULE}
+RECOMMENDATIONS
+{_RULE}
+
+1. Continue collecting data during various weather conditions
+2. Record freeze events with detailed notes
+3. Document any preventive measures taken (faucet dripping, etc.)
+4. Monitor patterns over multiple freeze/thaw cycles
+5. Consider installing temperature sensors on the actual pipe
+
+{_RULE}"""
+
+
+def _mean(values: np.ndarray, default: float = 0) -> float:
+    """Mean of an array skipping NaN, as pandas does, or the default for an empty one"""
+    if not values.size:
+        return default
+
+    values = values[~np.isnan(values)]
+    return float(values.mean()) if values.size else float('nan')
+
+
+@dataclass
+class EventSplit:
+    """Observation columns as arrays, with masks selecting the event groups"""
+    temperature_f: np.ndarray
+    wind_speed_mph: np.ndarray
+    wind_direction_deg: np.ndarray
+    humidity: np.ndarray
+    is_day: np.ndarray            # known daytime reading
+    is_night: np.ndarray          # known nighttime reading
+    freeze: np.ndarray            # pipe frozen
+    cold_no_freeze: np.ndarray    # below 32°F, pipe not frozen
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> 'EventSplit':
+        """Extract the analysis columns once so hypotheses avoid repeated scans"""
+        temperature_f = df['temperature_f'].to_numpy(dtype=np.float32)
+        pipe_frozen = df['pipe_frozen'].to_numpy(dtype=bool)
+        is_daytime = df['is_daytime']
+
+        return cls(
+            temperature_f=temperature_f,
+            wind_speed_mph=df['wind_speed_mph'].to_numpy(dtype=np.float32),
+            wind_direction_deg=df['wind_direction_deg'].to_numpy(dtype=np.float32),
+            humidity=df['humidity'].to_numpy(dtype=np.float32),
+            is_day=(is_daytime == True).to_numpy(dtype=bool, na_value=False),
+            is_night=(is_daytime == False).to_numpy(dtype=bool, na_value=False),
+            freeze=pipe_frozen,
+            cold_no_freeze=~pipe_frozen & (temperature_f < 32)
+        )
+
 
 class HypothesisGenerator:
     """Generates hypotheses about non-linear pipe freezing patterns"""
 
-    def __init__(self, config_path: str = "config.yaml"):
-        """Initialize hypothesis generator"""
-        with open(config_path, 'r') as f:
-            self.config = yaml.safe_load(f)
+    def __init__(self, config_path: str = "config.yaml",
+                 analyzer: Optional[FrozenPipeAnalyzer] = None):
+        """Initialize hypothesis generator, optionally reusing an existing analyzer"""
+        self.config_path = config_path
+        self.config = load_config(config_path)
 
-        self.analyzer = FrozenPipeAnalyzer(config_path)
+        self.analyzer = analyzer or FrozenPipeAnalyzer(config_path)
+        self.report_cache_path = self.analyzer.data_path.parent / '.hypothesis_cache.json'
 
     def analyze_non_linear_pattern(self) -> Dict:
         """
         Analyze why pipes freeze at moderate cold but not extreme cold.
         Returns comprehensive hypothesis analysis.
         """
-        df = self.analyzer.df
+        df = self.analyzer.analysis_df
 
-        if df.empty:
+        if df is None or len(df) == 0:
             return {"error": "No data available for analysis"}
 
-        # Separate freeze and no-freeze events
-        freeze_events = df[df['pipe_frozen'] == True].copy()
-        no_freeze_events = df[df['pipe_frozen'] == False].copy()
-        cold_no_freeze = no_freeze_events[no_freeze_events['temperature_f'] < 32].copy()
+        # Separate freeze and cold no-freeze events
+        split = EventSplit.from_dataframe(df)
 
         hypotheses = {
             'timestamp': datetime.now().isoformat(),
             'data_summary': {
                 'total_observations': len(df),
-                'freeze_events': len(freeze_events),
-                'cold_no_freeze_events': len(cold_no_freeze)
+                'freeze_events': int(split.freeze.sum()),
+                'cold_no_freeze_events': int(split.cold_no_freeze.sum())
             },
             'hypotheses': []
         }
 
+        # Without freeze events only the preparedness hypothesis has anything to report
+        if not hypotheses['data_summary']['freeze_events']:
+            h3 = self._hypothesis_extreme_cold_preparation(split)
+            if h3:
+                hypotheses['hypotheses'].append(h3)
+
+            self._calculate_confidence_scores(hypotheses)
+            return hypotheses
+
         # Hypothesis 1: Wind Chill + Direction Combination
-        h1 = self._hypothesis_wind_chill_direction(freeze_events, cold_no_freeze)
+        h1 = self._hypothesis_wind_chill_direction(split)
         if h1:
             hypotheses['hypotheses'].append(h1)
 
         # Hypothesis 2: Moderate Cold + Prolonged Exposure
-        h2 = self._hypothesis_duration_exposure(freeze_events, cold_no_freeze)
+        h2 = self._hypothesis_duration_exposure(split)
         if h2:
             hypotheses['hypotheses'].append(h2)
 
         # Hypothesis 3: Extreme Cold Preparedness
-        h3 = self._hypothesis_extreme_cold_preparation(freeze_events, cold_no_freeze)
+        h3 = self._hypothesis_extreme_cold_preparation(split)
         if h3:
             hypotheses['hypotheses'].append(h3)
 
         # Hypothesis 4: Humidity and Condensation
-        h4 = self._hypothesis_humidity_effect(freeze_events, cold_no_freeze)
+        h4 = self._hypothesis_humidity_effect(split)
         if h4:
             hypotheses['hypotheses'].append(h4)
 
         # Hypothesis 5: Solar Radiation and Time of Day
-        h5 = self._hypothesis_solar_radiation(freeze_events, cold_no_freeze)
+        h5 = self._hypothesis_solar_radiation(split)
         if h5:
             hypotheses['hypotheses'].append(h5)
 
         # Hypothesis 6: Wind Speed Threshold Effect
-        h6 = self._hypothesis_wind_speed_threshold(freeze_events, cold_no_freeze)
+        h6 = self._hypothesis_wind_speed_threshold(split)
         if h6:
             hypotheses['hypotheses'].append(h6)
 
@@ -84,32 +183,23 @@ class HypothesisGenerator:
 
         return hypotheses
 
-    def _hypothesis_wind_chill_direction(self, freeze: pd.DataFrame, no_freeze: pd.DataFrame) -> Dict:
+    def _hypothesis_wind_chill_direction(self, split: EventSplit) -> Dict:
         """
         Hypothesis: Pipes freeze when wind from vulnerable direction combines
         with moderate cold, but extreme cold from any direction causes protection.
         """
-        if freeze.empty:
+        freeze, no_freeze = split.freeze, split.cold_no_freeze
+        if not freeze.any():
             return None
 
-        vulnerable_dirs = self.config['analysis']['vulnerable_wind_directions']
-        tolerance = self.config['analysis']['vulnerable_direction_tolerance']
+        is_vulnerable_dir = self.analyzer.vulnerable_direction_mask(split.wind_direction_deg)
 
-        def is_vulnerable_dir(deg):
-            return any(
-                abs(deg - vdir) <= tolerance or abs(deg - vdir) >= (360 - tolerance)
-                for vdir in vulnerable_dirs
-            )
-
-        freeze['is_vulnerable_dir'] = freeze['wind_direction_deg'].apply(is_vulnerable_dir)
-        no_freeze['is_vulnerable_dir'] = no_freeze['wind_direction_deg'].apply(is_vulnerable_dir)
-
-        freeze_vuln_pct = freeze['is_vulnerable_dir'].mean() * 100 if not freeze.empty else 0
-        no_freeze_vuln_pct = no_freeze['is_vulnerable_dir'].mean() * 100 if not no_freeze.empty else 0
+        freeze_vuln_pct = _mean(is_vulnerable_dir[freeze]) * 100
+        no_freeze_vuln_pct = _mean(is_vulnerable_dir[no_freeze]) * 100
 
         # Calculate average temps
-        freeze_avg_temp = freeze['temperature_f'].mean() if not freeze.empty else 0
-        no_freeze_avg_temp = no_freeze['temperature_f'].mean() if not no_freeze.empty else 0
+        freeze_avg_temp = _mean(split.temperature_f[freeze])
+        no_freeze_avg_temp = _mean(split.temperature_f[no_freeze])
 
         evidence = []
 
@@ -119,10 +209,11 @@ class HypothesisGenerator:
         if no_freeze_vuln_pct < 30:
             evidence.append(f"Only {no_freeze_vuln_pct:.0f}% of cold no-freeze events had vulnerable wind direction")
 
-        if not freeze.empty and not no_freeze.empty:
-            freeze_with_wind = freeze[freeze['wind_speed_mph'] > 5]
-            if not freeze_with_wind.empty:
-                avg_wind = freeze_with_wind['wind_speed_mph'].mean()
+        if no_freeze.any():
+            freeze_wind = split.wind_speed_mph[freeze]
+            freeze_with_wind = freeze_wind[freeze_wind > 5]
+            if freeze_with_wind.size:
+                avg_wind = _mean(freeze_with_wind)
                 evidence.append(f"Average wind speed during freeze: {avg_wind:.1f} mph")
 
         return {
@@ -142,12 +233,12 @@ class HypothesisGenerator:
             'confidence': 0.0  # Will be calculated later
         }
 
-    def _hypothesis_duration_exposure(self, freeze: pd.DataFrame, no_freeze: pd.DataFrame) -> Dict:
+    def _hypothesis_duration_exposure(self, split: EventSplit) -> Dict:
         """
         Hypothesis: Moderate cold for extended periods causes freezing,
         while brief extreme cold doesn't allow heat loss.
         """
-        if freeze.empty:
+        if not split.freeze.any():
             return None
 
         # This would require time-series analysis of consecutive cold periods
@@ -173,16 +264,19 @@ class HypothesisGenerator:
             'confidence': 0.0
         }
 
-    def _hypothesis_extreme_cold_preparation(self, freeze: pd.DataFrame, no_freeze: pd.DataFrame) -> Dict:
+    def _hypothesis_extreme_cold_preparation(self, split: EventSplit) -> Dict:
         """
         Hypothesis: Extreme cold prompts protective measures, moderate cold doesn't.
         """
-        if freeze.empty and no_freeze.empty:
+        freeze, no_freeze = split.freeze, split.cold_no_freeze
+        if not freeze.any() and not no_freeze.any():
             return None
 
-        freeze_avg_temp = freeze['temperature_f'].mean() if not freeze.empty else 32
-        no_freeze_cold = no_freeze[no_freeze['temperature_f'] < 15] if not no_freeze.empty else pd.DataFrame()
-        no_freeze_cold_avg = no_freeze_cold['temperature_f'].mean() if not no_freeze_cold.empty else 0
+        temperature_f = split.temperature_f
+        freeze_avg_temp = _mean(temperature_f[freeze], default=32)
+        no_freeze_cold = no_freeze & (temperature_f < 15)
+        has_no_freeze_cold = no_freeze_cold.any()
+        no_freeze_cold_avg = _mean(temperature_f[no_freeze_cold])
 
         evidence = []
 
@@ -191,7 +285,7 @@ class HypothesisGenerator:
                 f"Average freeze temperature ({freeze_avg_temp:.1f}°F) is in the 'moderate cold' range"
             )
 
-        if not no_freeze_cold.empty:
+        if has_no_freeze_cold:
             evidence.append(
                 f"No freezing occurred at much colder temperatures (avg: {no_freeze_cold_avg:.1f}°F)"
             )
@@ -212,20 +306,21 @@ class HypothesisGenerator:
             'evidence': evidence,
             'supporting_data': {
                 'freeze_avg_temp': round(freeze_avg_temp, 1),
-                'extreme_cold_no_freeze_avg': round(no_freeze_cold_avg, 1) if not no_freeze_cold.empty else None
+                'extreme_cold_no_freeze_avg': round(no_freeze_cold_avg, 1) if has_no_freeze_cold else None
             },
             'confidence': 0.0
         }
 
-    def _hypothesis_humidity_effect(self, freeze: pd.DataFrame, no_freeze: pd.DataFrame) -> Dict:
+    def _hypothesis_humidity_effect(self, split: EventSplit) -> Dict:
         """
         Hypothesis: High humidity at moderate cold increases freeze risk.
         """
-        if freeze.empty:
+        freeze, no_freeze = split.freeze, split.cold_no_freeze
+        if not freeze.any():
             return None
 
-        freeze_avg_humidity = freeze['humidity'].mean() if not freeze.empty else 0
-        no_freeze_avg_humidity = no_freeze['humidity'].mean() if not no_freeze.empty else 0
+        freeze_avg_humidity = _mean(split.humidity[freeze])
+        no_freeze_avg_humidity = _mean(split.humidity[no_freeze])
 
         evidence = []
 
@@ -258,18 +353,21 @@ class HypothesisGenerator:
             'confidence': 0.0
         }
 
-    def _hypothesis_solar_radiation(self, freeze: pd.DataFrame, no_freeze: pd.DataFrame) -> Dict:
+    def _hypothesis_solar_radiation(self, split: EventSplit) -> Dict:
         """
         Hypothesis: Nighttime moderate cold vs daytime extreme cold.
         """
-        if freeze.empty:
+        freeze, no_freeze = split.freeze, split.cold_no_freeze
+        freeze_count = freeze.sum()
+        if not freeze_count:
             return None
 
-        freeze_night = freeze[freeze['is_daytime'] == False]
-        no_freeze_day = no_freeze[no_freeze['is_daytime'] == True]
+        no_freeze_count = no_freeze.sum()
+        freeze_night_count = (freeze & split.is_night).sum()
+        no_freeze_day_count = (no_freeze & split.is_day).sum()
 
-        freeze_night_pct = (len(freeze_night) / len(freeze) * 100) if not freeze.empty else 0
-        no_freeze_day_pct = (len(no_freeze_day) / len(no_freeze) * 100) if not no_freeze.empty else 0
+        freeze_night_pct = freeze_night_count / freeze_count * 100
+        no_freeze_day_pct = (no_freeze_day_count / no_freeze_count * 100) if no_freeze_count else 0
 
         evidence = []
 
@@ -300,19 +398,21 @@ class HypothesisGenerator:
             'confidence': 0.0
         }
 
-    def _hypothesis_wind_speed_threshold(self, freeze: pd.DataFrame, no_freeze: pd.DataFrame) -> Dict:
+    def _hypothesis_wind_speed_threshold(self, split: EventSplit) -> Dict:
         """
         Hypothesis: Specific wind speed range causes optimal heat loss.
         """
-        if freeze.empty:
+        freeze, no_freeze = split.freeze, split.cold_no_freeze
+        if not freeze.any():
             return None
 
-        freeze_avg_wind = freeze['wind_speed_mph'].mean() if not freeze.empty else 0
-        no_freeze_avg_wind = no_freeze['wind_speed_mph'].mean() if not no_freeze.empty else 0
+        freeze_wind = split.wind_speed_mph[freeze]
+        freeze_avg_wind = _mean(freeze_wind)
+        no_freeze_avg_wind = _mean(split.wind_speed_mph[no_freeze])
 
         # Check for wind speed "sweet spot"
-        freeze_moderate_wind = freeze[(freeze['wind_speed_mph'] >= 5) & (freeze['wind_speed_mph'] <= 20)]
-        moderate_wind_pct = (len(freeze_moderate_wind) / len(freeze) * 100) if not freeze.empty else 0
+        freeze_moderate_wind = (freeze_wind >= 5) & (freeze_wind <= 20)
+        moderate_wind_pct = _mean(freeze_moderate_wind) * 100
 
         evidence = []
 
@@ -366,55 +466,79 @@ class HypothesisGenerator:
 
             h['confidence'] = min(round(score, 2), 1.0)
 
+    def _report_cache_key(self) -> Optional[str]:
+        """Identify the current data and config files, or None if there is no data"""
+        try:
+            data_st = os.stat(self.analyzer.data_path)
+            config_st = os.stat(self.config_path)
+        except OSError:
+            return None
+
+        return (f"{data_st.st_mtime_ns}:{data_st.st_size}:"
+                f"{config_st.st_mtime_ns}:{config_st.st_size}")
+
     def generate_report(self) -> str:
-        """Generate a comprehensive text report"""
+        """Generate a comprehensive text report, reused until new data arrives"""
+        cache_key = self._report_cache_key()
+        if cache_key is None:
+            return self._build_report()
+
+        try:
+            with open(self.report_cache_path, 'rb') as f:
+                data = f.read()
+            cached = orjson.loads(data) if orjson is not None else json.loads(data)
+            if cached.get('key') == cache_key:
+                return cached['report']
+        except (OSError, ValueError, KeyError, AttributeError):
+            pass
+
+        report = self._build_report()
+
+        tmp_path = self.report_cache_path.with_name(
+            f"{self.report_cache_path.name}.{os.getpid()}.tmp"
+        )
+        try:
+            entry = {'key': cache_key, 'report': report}
+            with open(tmp_path, 'wb') as f:
+                if orjson is not None:
+                    f.write(orjson.dumps(entry))
+                else:
+                    f.write(json.dumps(entry).encode('utf-8'))
+            os.replace(tmp_path, self.report_cache_path)
+        except OSError:
+            # The cache is only an optimization
+            tmp_path.unlink(missing_ok=True)
+
+        return report
+
+    def _build_report(self) -> str:
+        """Run the analysis and format the text report"""
         analysis = self.analyze_non_linear_pattern()
 
         if 'error' in analysis:
             return f"Error: {analysis['error']}"
 
-        report = []
-        report.append("=" * 70)
-        report.append("FROZEN PIPE NON-LINEAR BEHAVIOR ANALYSIS")
-        report.append("=" * 70)
-        report.append(f"\nGenerated: {analysis['timestamp']}")
-        report.append(f"\nData Summary:")
-        report.append(f"  • Total Observations: {analysis['data_summary']['total_observations']}")
-        report.append(f"  • Freeze Events: {analysis['data_summary']['freeze_events']}")
-        report.append(f"  • Cold No-Freeze Events: {analysis['data_summary']['cold_no_freeze_events']}")
-
-        report.append("\n" + "=" * 70)
-        report.append("HYPOTHESES FOR NON-LINEAR FREEZING PATTERN")
-        report.append("=" * 70)
+        report = io.StringIO()
+        report.write(_REPORT_HEADER.format(timestamp=analysis['timestamp'],
+                                           **analysis['data_summary']))
 
         for i, h in enumerate(analysis['hypotheses'], 1):
-            report.append(f"\n{i}. {h['name']}")
-            report.append(f"   Confidence: {h['confidence'] * 100:.0f}%")
-            report.append(f"\n   {h['description']}")
+            report.write(_HYPOTHESIS_HEADER.format(index=i, **h))
 
-            report.append(f"\n   Evidence:")
             for evidence in h['evidence']:
-                report.append(f"     • {evidence}")
+                report.write(f"\n     • {evidence}")
 
             if h['supporting_data']:
-                report.append(f"\n   Supporting Data:")
+                report.write("\n\n   Supporting Data:")
                 for key, value in h['supporting_data'].items():
                     if value is not None:
-                        report.append(f"     • {key}: {value}")
+                        report.write(f"\n     • {key}: {value}")
 
-            report.append("")
+            report.write("\n")
 
-        report.append("=" * 70)
-        report.append("RECOMMENDATIONS")
-        report.append("=" * 70)
-        report.append("\n1. Continue collecting data during various weather conditions")
-        report.append("2. Record freeze events with detailed notes")
-        report.append("3. Document any preventive measures taken (faucet dripping, etc.)")
-        report.append("4. Monitor patterns over multiple freeze/thaw cycles")
-        report.append("5. Consider installing temperature sensors on the actual pipe")
-        report.append("\n" + "=" * 70)
+        report.write(_REPORT_FOOTER)
 
-        return "\n".join(report)
+        return report.getvalue()
 
 
 if __name__ == "__main__":
@@ -5,8 +5,11 @@ Provides easy interface for data collection and analysis
 """
 
 import argparse
+import asyncio
+import csv
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import json
 
@@ -20,10 +23,17 @@ def collect_data(args):
     analyzer = FrozenPipeAnalyzer(args.config)
 
     if args.freeze:
-        notes = args.notes or input("Notes about freeze event: ")
+        if args.notes is not None:
+            notes = args.notes
+        elif sys.stdin.isatty():
+            notes = input("Notes about freeze event: ")
+        else:
+            # No terminal to prompt on (cron, systemd); record without notes
+            notes = ""
         success = analyzer.collect_and_store(pipe_frozen=True, notes=notes)
     else:
-        success = analyzer.collect_and_store(pipe_frozen=False, notes=args.notes or "")
+        success = analyzer.collect_and_store(pipe_frozen=False, notes=args.notes or "",
+                                           force_refresh=True)
 
     if success:
         print("✓ Data collected successfully")
@@ -105,6 +115,54 @@ def show_summary(args):
     return 0
 
 
+async def _monitor(analyzer: FrozenPipeAnalyzer, interval: float):
+    """Collect and store on a fixed schedule without blocking on the fetch"""
+    collect = analyzer.collector.async_collect_current_weather
+    monotonic = time.monotonic
+    strftime = time.strftime
+    period = interval * 60
+    loop = asyncio.get_running_loop()
+
+    def store(weather):
+        try:
+            analyzer.store_weather(weather)
+        except (OSError, ValueError, csv.Error) as e:
+            # Keep monitoring through disk errors or a malformed data file
+            print(f"Storing data failed: {e}", file=sys.stderr)
+        print(f"Next collection in {interval} minutes...")
+
+    # Observations are written on a worker thread, so a slow disk never holds
+    # up the event loop or the next fetch; one worker keeps rows in
+    # collection order. Leaving the block waits for the last write.
+    with ThreadPoolExecutor(max_workers=1) as writer:
+        async with analyzer.collector.async_session() as session:
+            pending = None
+            # Collections run on fixed ticks, so fetch time does not add drift
+            next_tick = monotonic()
+            while True:
+                print(f"\n[{strftime('%Y-%m-%d %H:%M:%S')}] Collecting data...")
+                fetch = asyncio.ensure_future(collect(session))
+                try:
+                    # Let the previous write finish while the request is in flight
+                    if pending is not None:
+                        await pending
+                    # Request errors are reported by the collector as None
+                    weather = await fetch
+                finally:
+                    # Don't leave the request running if the loop is leaving
+                    fetch.cancel()
+
+                pending = loop.run_in_executor(writer, store, weather)
+
+                next_tick += period
+                now = monotonic()
+                if next_tick < now:
+                    # Overran the interval; skip the missed ticks
+                    next_tick = now + period
+
+                await asyncio.sleep(next_tick - now)
+
+
 def monitor_continuous(args):
     """Continuously monitor and collect data"""
     analyzer = FrozenPipeAnalyzer(args.config)
@@ -114,12 +172,9 @@ def monitor_continuous(args):
     print("Press Ctrl+C to stop\n")
 
     try:
-        while True:
-            print(f"\n[{time.strftime('%Y-%m-%d %H:%M:%S')}] Collecting data...")
-            analyzer.collect_and_store()
-
-            print(f"Next collection in {interval} minutes...")
-            time.sleep(interval * 60)
+        # Closes the collector's pooled connections when monitoring stops
+        with analyzer.collector:
+            asyncio.run(_monitor(analyzer, interval))
 
     except KeyboardInterrupt:
         print("\n\nMonitoring stopped by user")
@@ -138,6 +193,7 @@ def main():
     )
 
     subparsers = parser.add_subparsers(dest='command', help='Command to execute')
+    subparsers.required = True
 
     # Collect command
     collect_parser = subparsers.add_parser('collect', help='Collect current weather data')
@@ -150,9 +206,11 @@ def main():
         '--notes', '-n',
         help='Notes about the observation'
     )
+    collect_parser.set_defaults(func=collect_data)
 
     # Analyze command
     analyze_parser = subparsers.add_parser('analyze', help='Analyze current conditions')
+    analyze_parser.set_defaults(func=analyze_current)
 
     # Hypotheses command
     hypo_parser = subparsers.add_parser('hypotheses', help='Generate hypothesis report')
@@ -160,9 +218,11 @@ def main():
         '--output', '-o',
         help='Output file path for report'
     )
+    hypo_parser.set_defaults(func=generate_hypotheses)
 
     # Summary command
     summary_parser = subparsers.add_parser('summary', help='Show data summary')
+    summary_parser.set_defaults(func=show_summary)
 
     # Monitor command
     monitor_parser = subparsers.add_parser('monitor', help='Continuously monitor and collect')
@@ -171,28 +231,12 @@ def main():
         type=int,
         help='Collection interval in minutes'
     )
+    monitor_parser.set_defaults(func=monitor_continuous)
 
     args = parser.parse_args()
 
-    if not args.command:
-        parser.print_help()
-        return 1
-
-    # Route to appropriate handler
-    handlers = {
-        'collect': collect_data,
-        'analyze': analyze_current,
-        'hypotheses': generate_hypotheses,
-        'summary': show_summary,
-        'monitor': monitor_continuous
-    }
-
-    handler = handlers.get(args.command)
-    if handler:
-        return handler(args)
-    else:
-        print(f"Unknown command: {args.command}")
-        return 1
+    # Route to the handler registered for the command
+    return args.func(args)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,60 @@
+"""
+Observation Store
+Appends weather observations to the CSV history without loading pandas
+"""
+
+import csv
+import io
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+# Column order used when creating a new observations file
+OBSERVATION_COLUMNS = [
+    'timestamp', 'temperature_f', 'feels_like_f', 'wind_chill_f',
+    'humidity', 'pressure', 'wind_speed_mph', 'wind_direction_deg',
+    'wind_direction_name', 'wind_gust_mph', 'weather_condition',
+    'weather_description', 'clouds_percent', 'visibility_meters',
+    'rain_1h_mm', 'snow_1h_mm', 'is_daytime', 'sunrise', 'sunset',
+    'pipe_frozen', 'notes'
+]
+
+
+def read_header(data_path: Path) -> Optional[List[str]]:
+    """Return the header of an existing data file, or None if there is none"""
+    if not data_path.exists():
+        return None
+
+    with open(data_path, 'r', newline='', encoding='utf-8') as f:
+        return next(csv.reader(f), None)
+
+
+def append_observation(data_path: Path, observation: Dict):
+    """Append one observation to the CSV file"""
+    append_observations(data_path, [observation])
+
+
+def append_observations(data_path: Path, observations: List[Dict]):
+    """
+    Append observations to the CSV file.
+    Rows follow the column order of an existing file; all rows (and the
+    header, for a new file) are formatted in memory and written with a
+    single write().
+    """
+    if not observations:
+        return
+
+    fieldnames = read_header(data_path)
+
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=fieldnames or OBSERVATION_COLUMNS,
+                            lineterminator='\n')
+
+    # Write header if new file
+    if not fieldnames:
+        writer.writeheader()
+
+    writer.writerows(observations)
+
+    with open(data_path, 'ab', buffering=1 << 16) as f:
+        f.write(buf.getvalue().encode('utf-8'))
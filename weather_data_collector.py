@@ -3,11 +3,79 @@ Weather Data Collector Module
 Fetches weather data from various APIs based on GPS location
 """
 
+import asyncio
+import contextlib
+import functools
+import time
 import requests
-import yaml
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from datetime import datetime, timedelta
-from typing import Dict, Optional
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple
 import json
+from config_util import load_config
+
+# orjson is optional; it parses API responses faster than the json module.
+# Both parse the raw response bytes, skipping a decode to str.
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    from json import loads as _json_loads
+
+# aiohttp is optional; without it async collection runs on a worker thread
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+# Cardinal direction names, one per 22.5 degree sector starting at north
+WIND_DIRECTIONS = ('N', 'NNE', 'NE', 'ENE', 'E', 'ESE', 'SE', 'SSE',
+                   'S', 'SSW', 'SW', 'WSW', 'W', 'WNW', 'NW', 'NNW')
+
+# Stand-in for optional response sections, e.g. 'rain' in dry weather
+_EMPTY = MappingProxyType({})
+
+# OpenWeatherMap refreshes current conditions roughly every 10 minutes
+CACHE_TTL_FRESH = 300
+CACHE_TTL_STALE = 1800
+
+
+@contextlib.asynccontextmanager
+async def _no_session():
+    """Stand-in for an aiohttp session when aiohttp is not installed"""
+    yield None
+
+
+def _ttl_cached(ttl_fresh: float, ttl_stale: float):
+    """
+    Cache a fetch method's result per (lat, lon, provider).
+    A reading younger than ttl_fresh is served without a request; if the
+    fetch fails, one younger than ttl_stale is returned flagged 'stale'.
+    force_refresh=True bypasses both.
+    """
+    def decorator(fetch):
+        @functools.wraps(fetch)
+        def wrapper(self, force_refresh: bool = False) -> Optional[Dict]:
+            key = (self.lat, self.lon, self.provider)
+            cached = None if force_refresh else self._cache.get(key)
+            now = time.monotonic()
+
+            if cached and now - cached[0] < ttl_fresh:
+                return dict(cached[1])
+
+            weather = fetch(self)
+            if weather is not None:
+                self._cache[key] = (now, weather)
+                return dict(weather)
+
+            if cached and now - cached[0] < ttl_stale:
+                print(f"Using cached weather data from {cached[1]['timestamp']}")
+                return dict(cached[1], stale=True)
+
+            return None
+        return wrapper
+    return decorator
 
 
 class WeatherDataCollector:
@@ -15,72 +83,181 @@ class WeatherDataCollector:
 
     def __init__(self, config_path: str = "config.yaml"):
         """Initialize collector with configuration"""
-        with open(config_path, 'r') as f:
-            self.config = yaml.safe_load(f)
+        self.config = load_config(config_path)
 
         self.lat = self.config['location']['latitude']
         self.lon = self.config['location']['longitude']
         self.api_key = self.config['weather_api']['api_key']
         self.provider = self.config['weather_api']['provider']
 
-    def collect_current_weather(self) -> Optional[Dict]:
-        """Collect current weather data"""
+        # Current weather endpoint and its query, fixed for this location
+        self._owm_url = "https://api.openweathermap.org/data/2.5/weather"
+        self._owm_params = MappingProxyType({
+            'lat': self.lat,
+            'lon': self.lon,
+            'appid': self.api_key,
+            'units': 'imperial'  # Fahrenheit
+        })
+
+        # Reuse keep-alive connections across requests; retry transient failures
+        self._session = requests.Session()
+        retry = Retry(total=3, backoff_factor=0.3,
+                      status_forcelist=[429, 500, 502, 503, 504])
+        self._session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=8,
+                                                    max_retries=retry))
+
+        # (lat, lon, provider) -> (monotonic time, weather dict)
+        self._cache: Dict[Tuple, Tuple[float, Dict]] = {}
+
+    def close(self):
+        """Close pooled HTTP connections"""
+        self._session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def collect_current_weather(self, force_refresh: bool = False) -> Optional[Dict]:
+        """
+        Collect current weather data.
+        Recent readings are served from cache; pass force_refresh=True to
+        always query the API.
+        """
+        if self.provider == "openweathermap":
+            return self._fetch_openweathermap(force_refresh=force_refresh)
+        else:
+            raise ValueError(f"Unsupported weather provider: {self.provider}")
+
+    async def async_collect_current_weather(self, session=None) -> Optional[Dict]:
+        """
+        Collect current weather data without blocking the event loop.
+        session comes from async_session(); it is None when aiohttp is not
+        installed, in which case the synchronous fetch runs on a thread.
+        Either way the reading is fetched fresh, bypassing the TTL cache,
+        so every monitor tick gets a new reading.
+        """
+        if session is None:
+            loop = asyncio.get_running_loop()
+            fetch = functools.partial(self.collect_current_weather, force_refresh=True)
+            return await loop.run_in_executor(None, fetch)
+
         if self.provider == "openweathermap":
-            return self._fetch_openweathermap()
+            return await self._async_fetch_openweathermap(session)
         else:
             raise ValueError(f"Unsupported weather provider: {self.provider}")
 
+    def collect_current_weather_batch(self, locations: List[Tuple[float, float]]) -> List[Optional[Dict]]:
+        """
+        Collect current weather for several (lat, lon) locations, in order.
+        With aiohttp the requests run concurrently on one pooled session;
+        otherwise they are made in turn on this collector's session.
+        Readings are always fetched fresh.
+        """
+        if self.provider != "openweathermap":
+            raise ValueError(f"Unsupported weather provider: {self.provider}")
+
+        queries = [dict(self._owm_params, lat=lat, lon=lon) for lat, lon in locations]
+
+        if aiohttp is None:
+            return [self._get_openweathermap(params) for params in queries]
+
+        return asyncio.run(self._async_fetch_openweathermap_batch(queries))
+
+    def async_session(self):
+        """Pooled aiohttp session for async_collect_current_weather"""
+        if aiohttp is None:
+            return _no_session()
+
+        connector = aiohttp.TCPConnector(limit=8, keepalive_timeout=60)
+        return aiohttp.ClientSession(connector=connector)
+
+    @_ttl_cached(CACHE_TTL_FRESH, CACHE_TTL_STALE)
     def _fetch_openweathermap(self) -> Optional[Dict]:
+        """Fetch data for the configured location from OpenWeatherMap API"""
+        return self._get_openweathermap(self._owm_params)
+
+    def _get_openweathermap(self, params: Mapping) -> Optional[Dict]:
         """Fetch data from OpenWeatherMap API"""
         try:
-            # Current weather
-            current_url = f"https://api.openweathermap.org/data/2.5/weather"
-            params = {
-                'lat': self.lat,
-                'lon': self.lon,
-                'appid': self.api_key,
-                'units': 'imperial'  # Fahrenheit
-            }
-
-            response = requests.get(current_url, params=params, timeout=10)
+            response = self._session.get(self._owm_url, params=params, timeout=10,
+                                         stream=False)
             response.raise_for_status()
-            data = response.json()
-
-            # Calculate wind chill
-            temp_f = data['main']['temp']
-            wind_speed_mph = data['wind']['speed']
-            wind_chill = self._calculate_wind_chill(temp_f, wind_speed_mph)
-
-            # Extract relevant data
-            weather_data = {
-                'timestamp': datetime.now().isoformat(),
-                'temperature_f': temp_f,
-                'feels_like_f': data['main']['feels_like'],
-                'wind_chill_f': wind_chill,
-                'humidity': data['main']['humidity'],
-                'pressure': data['main']['pressure'],
-                'wind_speed_mph': wind_speed_mph,
-                'wind_direction_deg': data['wind'].get('deg', 0),
-                'wind_gust_mph': data['wind'].get('gust', wind_speed_mph),
-                'weather_condition': data['weather'][0]['main'],
-                'weather_description': data['weather'][0]['description'],
-                'clouds_percent': data['clouds']['all'],
-                'visibility_meters': data.get('visibility', 10000),
-                'rain_1h_mm': data.get('rain', {}).get('1h', 0),
-                'snow_1h_mm': data.get('snow', {}).get('1h', 0),
-                'sunrise': datetime.fromtimestamp(data['sys']['sunrise']).isoformat(),
-                'sunset': datetime.fromtimestamp(data['sys']['sunset']).isoformat(),
-            }
-
-            return weather_data
+            return self._parse_openweathermap(_json_loads(response.content))
 
         except requests.exceptions.RequestException as e:
             print(f"Error fetching weather data: {e}")
             return None
-        except KeyError as e:
+        except (KeyError, ValueError) as e:
             print(f"Error parsing weather data: {e}")
             return None
 
+    async def _async_fetch_openweathermap_batch(self, queries: List[Mapping]) -> List[Optional[Dict]]:
+        """Fetch several locations concurrently over shared keep-alive connections"""
+        connector = aiohttp.TCPConnector(limit_per_host=6, keepalive_timeout=60)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            return await asyncio.gather(
+                *(self._async_fetch_openweathermap(session, params) for params in queries)
+            )
+
+    async def _async_fetch_openweathermap(self, session,
+                                          params: Optional[Mapping] = None) -> Optional[Dict]:
+        """Fetch data from OpenWeatherMap API on an aiohttp session"""
+        try:
+            async with session.get(self._owm_url, params=params or self._owm_params,
+                                   timeout=aiohttp.ClientTimeout(total=10)) as response:
+                response.raise_for_status()
+                data = _json_loads(await response.read())
+
+            return self._parse_openweathermap(data)
+
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"Error fetching weather data: {e}")
+            return None
+        except (KeyError, ValueError) as e:
+            print(f"Error parsing weather data: {e}")
+            return None
+
+    def _parse_openweathermap(self, data: Dict) -> Dict:
+        """Extract an observation from an OpenWeatherMap response"""
+        main = data['main']
+        wind = data['wind']
+        sys_info = data['sys']
+        condition = data['weather'][0]
+
+        # Calculate wind chill
+        temp_f = main['temp']
+        wind_speed_mph = wind['speed']
+        wind_chill = self._calculate_wind_chill(temp_f, wind_speed_mph)
+
+        # Compare epochs directly; the ISO strings are only for storage
+        now = time.time()
+        sunrise = sys_info['sunrise']
+        sunset = sys_info['sunset']
+
+        # Extract relevant data
+        return {
+            'timestamp': datetime.fromtimestamp(now).isoformat(),
+            'temperature_f': temp_f,
+            'feels_like_f': main['feels_like'],
+            'wind_chill_f': wind_chill,
+            'humidity': main['humidity'],
+            'pressure': main['pressure'],
+            'wind_speed_mph': wind_speed_mph,
+            'wind_direction_deg': wind.get('deg', 0),
+            'wind_gust_mph': wind.get('gust', wind_speed_mph),
+            'weather_condition': condition['main'],
+            'weather_description': condition['description'],
+            'clouds_percent': data['clouds']['all'],
+            'visibility_meters': data.get('visibility', 10000),
+            'rain_1h_mm': (data.get('rain') or _EMPTY).get('1h', 0),
+            'snow_1h_mm': (data.get('snow') or _EMPTY).get('1h', 0),
+            'sunrise': datetime.fromtimestamp(sunrise).isoformat(),
+            'sunset': datetime.fromtimestamp(sunset).isoformat(),
+            'is_daytime': self.is_daytime(now, sunrise, sunset),
+        }
+
     def _calculate_wind_chill(self, temp_f: float, wind_speed_mph: float) -> float:
         """
         Calculate wind chill temperature using NWS formula
@@ -89,26 +266,20 @@ class WeatherDataCollector:
         if temp_f > 50 or wind_speed_mph < 3:
             return temp_f
 
-        wind_chill = (35.74 +
-                     0.6215 * temp_f -
-                     35.75 * (wind_speed_mph ** 0.16) +
-                     0.4275 * temp_f * (wind_speed_mph ** 0.16))
+        # 35.74 + 0.6215*T - 35.75*V^0.16 + 0.4275*T*V^0.16, with V^0.16 factored out
+        w16 = wind_speed_mph ** 0.16
+        wind_chill = 35.74 + 0.6215 * temp_f + (-35.75 + 0.4275 * temp_f) * w16
 
         return round(wind_chill, 2)
 
     def get_wind_direction_name(self, degrees: float) -> str:
         """Convert wind direction in degrees to cardinal direction"""
-        directions = ['N', 'NNE', 'NE', 'ENE', 'E', 'ESE', 'SE', 'SSE',
-                     'S', 'SSW', 'SW', 'WSW', 'W', 'WNW', 'NW', 'NNW']
-        index = round(degrees / 22.5) % 16
-        return directions[index]
+        # Sectors are centred on each direction; & 15 wraps 360 back to N
+        return WIND_DIRECTIONS[int((degrees + 11.25) // 22.5) & 15]
 
-    def is_daytime(self, timestamp: str, sunrise: str, sunset: str) -> bool:
-        """Check if timestamp is during daytime"""
-        ts = datetime.fromisoformat(timestamp)
-        sr = datetime.fromisoformat(sunrise)
-        ss = datetime.fromisoformat(sunset)
-        return sr <= ts <= ss
+    def is_daytime(self, timestamp: float, sunrise: float, sunset: float) -> bool:
+        """Check if a Unix timestamp is during daytime"""
+        return sunrise <= timestamp <= sunset
 
 
 if __name__ == "__main__":
@@ -120,4 +291,4 @@ if __name__ == "__main__":
         print("Current Weather Data:")
         print(json.dumps(weather, indent=2))
         print(f"\nWind Direction: {collector.get_wind_direction_name(weather['wind_direction_deg'])}")
-        print(f"Is Daytime: {collector.is_daytime(weather['timestamp'], weather['sunrise'], weather['sunset'])}")
+        print(f"Is Daytime: {weather['is_daytime']}")